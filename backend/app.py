@@ -1,50 +1,120 @@
 import os
 from flask import Flask, request, jsonify
+from flask.globals import request_ctx
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from dotenv import load_dotenv
-from hume import HumeClient
+from hume import HumeBatchClient, BatchJobStatus
 from hume.models.config import ProsodyConfig
 import tempfile
 import asyncio
-import json
+import concurrent.futures
+import orjson
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import soundfile as sf
+import soxr
 from google.cloud import speech_v1
 from google.cloud.speech_v1 import types
 import google.generativeai as genai
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 from functools import wraps
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 # Load environment variables
 load_dotenv()
 
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson. Output is always compact UTF-8,
+    so separators and ensure_ascii are accepted but have no effect.
+    """
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.pop('sort_keys', False):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.pop('indent', None):
+            option |= orjson.OPT_INDENT_2
+        default = kwargs.pop('default', None)
+        kwargs.pop('separators', None)
+        kwargs.pop('ensure_ascii', None)
+        if kwargs:
+            raise TypeError(f"Unsupported JSON options: {', '.join(kwargs)}")
+        return orjson.dumps(obj, default=default, option=option).decode('utf-8')
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # Configure CORS to allow requests from frontend
-CORS(app, resources={
+CORS_RESOURCES = {
     r"/*": {
         "origins": ["http://localhost:3000", "http://localhost:3001", "http://127.0.0.1:3000", "http://127.0.0.1:3001"],
         "methods": ["GET", "POST", "OPTIONS"],
         "allow_headers": ["Content-Type", "Accept"],
         "supports_credentials": False
     }
-})
+}
+CORS(app, resources=CORS_RESOURCES)
 
 # Configure API clients
 HUME_API_KEY = os.getenv('HUME_API_KEY')
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 genai.configure(api_key=GOOGLE_API_KEY)
 
-# Initialize Google Cloud Speech client
-speech_client = speech_v1.SpeechClient()
+# Google Cloud Speech async client; its gRPC channel is bound to the event
+# loop it is created on, so it is created lazily on the shared loop
+speech_client = None
+
+# Bytes of audio per streaming request (Google's limit is 25 KB)
+STT_CHUNK_SIZE = 16 * 1024
+
+# Hume only accepts files by path, so spool uploads to tmpfs when available
+HUME_SCRATCH_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Initialize Hume AI client and prosody config once, shared by all requests
+hume_client = HumeBatchClient(HUME_API_KEY)
+prosody_config = ProsodyConfig()
+
+# Uploads arriving within this window are sent to Hume as a single job
+HUME_BATCH_SIZE = 8
+HUME_BATCH_MAX_LATENCY = 0.2  # seconds
+HUME_JOB_TIMEOUT = 120  # seconds
+HUME_POLL_INTERVAL = 0.5  # seconds between job status checks
 
 # Configure Gemini
 generation_config = {
-    "temperature": 0.7,
+    "temperature": 0.0,  # deterministic, so identical prompts can be cached
     "top_p": 0.8,
     "top_k": 40,
     "max_output_tokens": 1024,
 }
 model = genai.GenerativeModel(model_name="gemini-pro", generation_config=generation_config)
 
+# Static coaching instructions, kept as a stable prompt prefix so that it is
+# eligible for Gemini's implicit prefix caching across requests
+COACH_INSTRUCTION = """You are an expert public speaking coach. A user has submitted a recording of their speech in Russian.
+Analyze the provided data and give them constructive feedback in Russian language.
+
+Please provide a detailed analysis that includes:
+1. Overall impression of their emotional delivery
+2. Specific feedback on their use of filler words
+3. Constructive suggestions for improvement
+4. At least two specific exercises they can practice
+
+Format the response in clear sections with bullet points where appropriate.
+Keep the tone encouraging while being honest about areas for improvement."""
+
 # Russian filler words list
 RUSSIAN_FILLER_WORDS = [
     'ну', 'это', 'как бы', 'вот', 'типа', 'значит', 'короче', 'так сказать',
@@ -52,53 +122,385 @@ RUSSIAN_FILLER_WORDS = [
     'как-то так', 'в принципе', 'на самом деле', 'естественно', 'получается'
 ]
 
+# Aho-Corasick automaton over the filler words, built once at import
+FILLER_AUTOMATON = None
+if ahocorasick is not None:
+    FILLER_AUTOMATON = ahocorasick.Automaton()
+    for filler_word in RUSSIAN_FILLER_WORDS:
+        FILLER_AUTOMATON.add_word(filler_word, filler_word)
+    FILLER_AUTOMATON.make_automaton()
+
+# UTF-8 encoded filler words for the fallback path without pyahocorasick
+RUSSIAN_FILLER_BYTES = [word.encode('utf-8') for word in RUSSIAN_FILLER_WORDS]
+
+# Number of top Hume emotions kept per prediction segment
+EMOTIONS_PER_SEGMENT = 5
+
+# Uploads are converted to 16 kHz mono 16-bit audio before analysis
+TARGET_SAMPLE_RATE = 16000
+
+# Recordings quieter or shorter than this are rejected before any API call
+MIN_AUDIO_RMS = 300
+MIN_AUDIO_DURATION = 1.0  # seconds
+
+# Response caching settings
+RESPONSE_CACHE_TTL = 24 * 60 * 60  # seconds
+RESPONSE_CACHE_MAX_SIZE = 256
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_MAX_SIZE = 1024
+EMBEDDING_MODEL = "models/embedding-001"
+
+class ResponseCache:
+    """
+    Thread-safe in-memory LRU cache whose entries expire after a TTL
+    """
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+class SemanticCache:
+    """
+    Thread-safe store of normalized embeddings and their values, looked up
+    by cosine similarity among entries recorded with the same context
+    """
+    def __init__(self, threshold: float, max_size: int):
+        self.threshold = threshold
+        self.max_size = max_size
+        self._embeddings = None
+        self._contexts = []
+        self._values = []
+        self._lock = threading.Lock()
+
+    def get(self, embedding: np.ndarray, context: Any) -> Any:
+        with self._lock:
+            candidates = [i for i, entry_context in enumerate(self._contexts) if entry_context == context]
+            if not candidates:
+                return None
+            scores = self._embeddings[candidates] @ embedding
+            best = int(np.argmax(scores))
+            if scores[best] > self.threshold:
+                return self._values[candidates[best]]
+            return None
+
+    def add(self, embedding: np.ndarray, context: Any, value: Any) -> None:
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = embedding[np.newaxis, :]
+            else:
+                self._embeddings = np.vstack([self._embeddings, embedding])
+            self._contexts.append(context)
+            self._values.append(value)
+            if len(self._values) > self.max_size:
+                self._embeddings = self._embeddings[1:]
+                self._contexts.pop(0)
+                self._values.pop(0)
+
+class HumeJobBatcher:
+    """
+    Coalesces Hume submissions that arrive close together into one
+    multi-file job and hands each caller the predictions for its own file.
+    Must be used from the shared event loop.
+    """
+    def __init__(self, client: Any, configs: List[Any], max_batch_size: int, max_latency: float,
+                 job_timeout: float, poll_interval: float):
+        self.client = client
+        self.configs = configs
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.job_timeout = job_timeout
+        self.poll_interval = poll_interval
+        self._queue = None
+        self._tasks = set()
+
+    async def submit(self, audio_file_path: str) -> Any:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._spawn(self._collect_batches())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((audio_file_path, future))
+        return await future
+
+    def _spawn(self, coro) -> None:
+        # Keep a reference so running tasks are not garbage collected
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _collect_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_latency
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Run the job in the background so the next batch can start collecting
+            self._spawn(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Any]) -> None:
+        paths = [path for path, _ in batch]
+        try:
+            full_predictions = await self._run_job(paths)
+            predictions_by_file = {
+                file_predictions['source']['filename']: file_predictions
+                for file_predictions in full_predictions
+            }
+            for path, future in batch:
+                if not future.done():
+                    future.set_result(predictions_by_file.get(os.path.basename(path)))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Never leave a caller waiting, even if the task itself is cancelled
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Hume batch finished without a result"))
+
+    async def _run_job(self, paths: List[str]) -> List[Dict[str, Any]]:
+        # Only the short HTTP calls go to worker threads; waiting for the job
+        # happens on the loop, polling at a fixed interval
+        loop = asyncio.get_running_loop()
+        job = await asyncio.to_thread(self.client.submit_job, [], self.configs, files=paths)
+        deadline = loop.time() + self.job_timeout
+        while True:
+            status = await asyncio.to_thread(job.get_status)
+            if BatchJobStatus.is_terminal(status):
+                break
+            if loop.time() >= deadline:
+                raise TimeoutError(f"Hume job {job.id} did not finish within {self.job_timeout} seconds")
+            await asyncio.sleep(self.poll_interval)
+
+        if status == BatchJobStatus.FAILED:
+            raise RuntimeError(f"Hume job {job.id} failed")
+        return await asyncio.to_thread(job.get_predictions)
+
+# Shared batcher for all Hume prosody requests
+hume_batcher = HumeJobBatcher(
+    hume_client, [prosody_config], HUME_BATCH_SIZE, HUME_BATCH_MAX_LATENCY, HUME_JOB_TIMEOUT, HUME_POLL_INTERVAL
+)
+
+# Full /analyze responses keyed by the SHA-256 of the uploaded audio
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_SIZE, RESPONSE_CACHE_TTL)
+# Gemini feedback keyed by transcript embedding, reused only for the same
+# filler-word counts and dominant emotions
+feedback_cache = SemanticCache(SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_SIZE)
+# Gemini feedback keyed by the SHA-256 of the exact prompt
+prompt_cache = ResponseCache(RESPONSE_CACHE_MAX_SIZE, RESPONSE_CACHE_TTL)
+
 def allowed_file(filename, allowed_types):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_types
 
+# Persistent event loop shared by all async routes
+ASYNC_ROUTE_TIMEOUT = 180  # seconds, longer than HUME_JOB_TIMEOUT
+# Threads for blocking work sent off the loop with asyncio.to_thread. A
+# request holds at most two at a time (the parallel WAV/FLAC encodes), so
+# this serves twice as many concurrent requests (see gunicorn.conf.py).
+LOOP_EXECUTOR_WORKERS = 32
+event_loop = asyncio.new_event_loop()
+event_loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(max_workers=LOOP_EXECUTOR_WORKERS))
+threading.Thread(target=event_loop.run_forever, daemon=True).start()
+
 def async_route(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        return asyncio.run(f(*args, **kwargs))
+        # The coroutine runs on the loop thread, so carry the request context over
+        ctx = request_ctx.copy()
+
+        async def run_in_context():
+            with ctx:
+                return await f(*args, **kwargs)
+
+        future = asyncio.run_coroutine_threadsafe(run_in_context(), event_loop)
+        try:
+            return future.result(timeout=ASYNC_ROUTE_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            return jsonify({'error': 'Request timed out'}), 504
     return decorated_function
 
+def read_upload(upload: Any) -> Tuple[bytes, str]:
+    """
+    Read an uploaded file and return its bytes with their SHA-256 digest
+    """
+    audio_bytes = upload.read()
+    return audio_bytes, hashlib.sha256(audio_bytes).hexdigest()
+
+def spool_audio(audio_bytes: bytes) -> str:
+    """
+    Write audio to a scratch file for Hume and return its path
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav', dir=HUME_SCRATCH_DIR) as temp_audio:
+        temp_audio.write(audio_bytes)
+    return temp_audio.name
+
+def prepare_audio(audio_bytes: bytes) -> np.ndarray:
+    """
+    Decode an uploaded recording into 16 kHz mono int16 samples
+    """
+    samples, sample_rate = sf.read(io.BytesIO(audio_bytes), dtype='int16')
+    if samples.ndim == 2:
+        samples = samples.mean(axis=1).astype(np.int16)
+    if sample_rate != TARGET_SAMPLE_RATE:
+        samples = soxr.resample(samples, sample_rate, TARGET_SAMPLE_RATE, quality='HQ').astype(np.int16)
+    return samples
+
+def encode_audio(samples: np.ndarray, audio_format: str) -> bytes:
+    """
+    Encode 16 kHz mono int16 samples as a WAV or FLAC file
+    """
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, TARGET_SAMPLE_RATE, subtype='PCM_16', format=audio_format)
+    return buffer.getvalue()
+
+def is_audio_too_quiet_or_short(samples: np.ndarray) -> bool:
+    """
+    Check whether a prepared recording is silent or too short to analyze
+    """
+    if len(samples) / TARGET_SAMPLE_RATE < MIN_AUDIO_DURATION:
+        return True
+
+    rms = np.sqrt(np.mean(np.square(samples, dtype=np.float32)))
+    return rms < MIN_AUDIO_RMS
+
+def _str_char_before(text: str, index: int) -> Tuple[str, int]:
+    return text[index - 1], index - 1
+
+def _str_char_after(text: str, index: int) -> Tuple[str, int]:
+    return text[index], index + 1
+
+def _utf8_char_before(data: bytes, index: int) -> Tuple[str, int]:
+    start = index - 1
+    while start > 0 and data[start] & 0xC0 == 0x80:
+        start -= 1
+    return data[start:index].decode('utf-8'), start
+
+def _utf8_char_after(data: bytes, index: int) -> Tuple[str, int]:
+    end = index + 1
+    while end < len(data) and data[end] & 0xC0 == 0x80:
+        end += 1
+    return data[index:end].decode('utf-8'), end
+
+def _find_all(data: bytes, sub: bytes):
+    start = data.find(sub)
+    while start != -1:
+        yield start
+        start = data.find(sub, start + 1)
+
+def _count_filler_matches(text: Any, matches: Any, char_before: Any, char_after: Any) -> Dict[str, int]:
+    """
+    Count filler matches given as (start, end, word) spans over text,
+    keeping only those that sit on word boundaries
+    """
+    counts = {}
+    last_spans = {}
+    length = len(text)
+
+    for start, end, word in matches:
+        # Let repeats of the filler's first and last letter extend the match
+        while start > 0:
+            char, previous = char_before(text, start)
+            if char != word[0]:
+                break
+            start = previous
+        while end < length:
+            char, following = char_after(text, end)
+            if char != word[-1]:
+                break
+            end = following
+        if start > 0 and char_before(text, start)[0].isalpha():
+            continue
+        if end < length and char_after(text, end)[0].isalpha():
+            continue
+        # Overlapping hits inside one drawn-out sound extend to the same span
+        if last_spans.get(word) == (start, end):
+            continue
+        last_spans[word] = (start, end)
+        counts[word] = counts.get(word, 0) + 1
+
+    return counts
+
 def count_filler_words(transcript: str) -> Dict[str, int]:
     """
     Count occurrences of Russian filler words in the transcript.
+    Matches are counted only on word boundaries, in a single pass.
+    Drawn-out sounds such as "ээээ" or "нууу" count once as their filler.
+    Without pyahocorasick, the UTF-8 bytes are scanned once per filler word
+    with the same boundary rules.
     """
-    counts = {}
     transcript_lower = transcript.lower()
-    
-    for word in RUSSIAN_FILLER_WORDS:
-        count = transcript_lower.count(word)
-        if count > 0:
-            counts[word] = count
-            
-    return counts
 
-async def analyze_voice_emotion(audio_file_path: str) -> Dict[str, Any]:
+    if FILLER_AUTOMATON is None:
+        transcript_bytes = transcript_lower.encode('utf-8')
+        matches = (
+            (start, start + len(word_bytes), word)
+            for word, word_bytes in zip(RUSSIAN_FILLER_WORDS, RUSSIAN_FILLER_BYTES)
+            for start in _find_all(transcript_bytes, word_bytes)
+        )
+        return _count_filler_matches(transcript_bytes, matches, _utf8_char_before, _utf8_char_after)
+
+    matches = (
+        (end - len(word) + 1, end + 1, word)
+        for end, word in FILLER_AUTOMATON.iter(transcript_lower)
+    )
+    return _count_filler_matches(transcript_lower, matches, _str_char_before, _str_char_after)
+
+async def analyze_voice_emotion(audio_bytes: bytes) -> Dict[str, Any]:
     """
     Analyze voice emotions using Hume AI's Prosody API
     """
     try:
-        client = HumeClient(HUME_API_KEY)
-        config = ProsodyConfig()
-        
-        # Send the file for analysis
-        result = client.submit_job(audio_file_path, [config])
-        
-        # Get the full predictions
-        full_predictions = result.get_predictions()
+        audio_path = await asyncio.to_thread(spool_audio, audio_bytes)
+
+        try:
+            # Send the file for analysis as part of the next batched job
+            file_predictions = await hume_batcher.submit(audio_path)
+        finally:
+            # Clean up temporary file
+            await asyncio.to_thread(os.unlink, audio_path)
         
         # Process emotions
         emotions = []
-        if full_predictions and len(full_predictions) > 0:
-            predictions = full_predictions[0]['results']['predictions']
-            for pred in predictions:
-                emotions.extend([{
-                    'name': emotion['name'],
-                    'score': emotion['score']
-                } for emotion in pred['emotions']])
-            
+        if file_predictions:
+            for file_result in file_predictions['results']['predictions']:
+                prosody = file_result['models'].get('prosody', {})
+                for group in prosody.get('grouped_predictions', []):
+                    for pred in group['predictions']:
+                        # Keep only the strongest emotions of each segment
+                        top_emotions = sorted(pred['emotions'], key=lambda x: x['score'], reverse=True)[:EMOTIONS_PER_SEGMENT]
+                        emotions.extend([{
+                            'name': emotion['name'],
+                            'score': emotion['score']
+                        } for emotion in top_emotions])
+
+        if emotions:
             # Find dominant emotions (top 3)
             emotions.sort(key=lambda x: x['score'], reverse=True)
             dominant_emotions = emotions[:3]
@@ -121,26 +523,41 @@ async def analyze_voice_emotion(audio_file_path: str) -> Dict[str, Any]:
             'error': str(e)
         }
 
-async def transcribe_audio(audio_file_path: str) -> Dict[str, Any]:
+def get_speech_client() -> speech_v1.SpeechAsyncClient:
     """
-    Transcribe audio using Google Cloud Speech-to-Text
+    Return the shared Speech async client, creating it on first use
+    """
+    global speech_client
+    if speech_client is None:
+        speech_client = speech_v1.SpeechAsyncClient()
+    return speech_client
+
+async def transcribe_audio(audio_bytes: bytes) -> Dict[str, Any]:
+    """
+    Transcribe audio using Google Cloud Speech-to-Text streaming recognition
     """
     try:
-        with open(audio_file_path, 'rb') as audio_file:
-            content = audio_file.read()
-
-        audio = types.RecognitionAudio(content=content)
-        config = types.RecognitionConfig(
-            encoding=speech_v1.RecognitionConfig.AudioEncoding.LINEAR16,
-            language_code="ru-RU",
-            enable_automatic_punctuation=True,
+        streaming_config = types.StreamingRecognitionConfig(
+            config=types.RecognitionConfig(
+                encoding=speech_v1.RecognitionConfig.AudioEncoding.FLAC,
+                language_code="ru-RU",
+                sample_rate_hertz=TARGET_SAMPLE_RATE,
+                enable_automatic_punctuation=True,
+            )
         )
 
-        response = speech_client.recognize(config=config, audio=audio)
+        async def request_stream():
+            yield types.StreamingRecognizeRequest(streaming_config=streaming_config)
+            for start in range(0, len(audio_bytes), STT_CHUNK_SIZE):
+                yield types.StreamingRecognizeRequest(audio_content=audio_bytes[start:start + STT_CHUNK_SIZE])
+
+        responses = await get_speech_client().streaming_recognize(requests=request_stream())
         
         full_transcript = ""
-        for result in response.results:
-            full_transcript += result.alternatives[0].transcript + " "
+        async for response in responses:
+            for result in response.results:
+                if result.is_final:
+                    full_transcript += result.alternatives[0].transcript + " "
             
         return {
             'success': True,
@@ -154,36 +571,75 @@ async def transcribe_audio(audio_file_path: str) -> Dict[str, Any]:
             'error': str(e)
         }
 
+def dumps_pretty(obj: Any) -> str:
+    """
+    Serialize an object as indented JSON for the Gemini prompt
+    """
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+def embed_transcript(transcript: str) -> np.ndarray:
+    """
+    Embed the transcript with Gemini and normalize it to unit length
+    """
+    result = genai.embed_content(model=EMBEDDING_MODEL, content=transcript)
+    embedding = np.asarray(result['embedding'], dtype=np.float32)
+    return embedding / np.linalg.norm(embedding)
+
 def generate_feedback(transcript: str, emotion_data: Dict[str, Any], filler_words: Dict[str, int]) -> Dict[str, Any]:
     """
     Generate feedback using Google Gemini
     """
     try:
-        # Construct the prompt
-        prompt = f"""You are an expert public speaking coach. A user has submitted a recording of their speech in Russian. 
-        Analyze the provided data and give them constructive feedback in Russian language.
-
-        Transcript:
-        {transcript}
-
-        Vocal Emotion Analysis:
-        Dominant emotions: {json.dumps(emotion_data['dominant_emotions'], ensure_ascii=False, indent=2)}
-        Full emotion data: {json.dumps(emotion_data['emotions'], ensure_ascii=False, indent=2)}
-
-        Filler Word Usage:
-        {json.dumps(filler_words, ensure_ascii=False, indent=2)}
-
-        Please provide a detailed analysis that includes:
-        1. Overall impression of their emotional delivery
-        2. Specific feedback on their use of filler words
-        3. Constructive suggestions for improvement
-        4. At least two specific exercises they can practice
+        # Construct the per-request part of the prompt
+        transcript_block = f"""Transcript:
+{transcript}"""
+
+        dominant_emotions = [
+            {'name': emotion['name'], 'score': round(emotion['score'], 2)}
+            for emotion in emotion_data['dominant_emotions']
+        ]
+        emotion_block = f"""Vocal Emotion Analysis:
+Dominant emotions: {dumps_pretty(dominant_emotions)}"""
+
+        filler_block = f"""Filler Word Usage:
+{dumps_pretty(filler_words)}"""
+
+        # Reuse feedback for an identical prompt
+        prompt_key = hashlib.sha256(
+            "\n\n".join([transcript_block, emotion_block, filler_block]).encode('utf-8')
+        ).hexdigest()
+        cached_feedback = prompt_cache.get(prompt_key)
+        if cached_feedback is not None:
+            return {
+                'success': True,
+                'feedback': cached_feedback
+            }
 
-        Format the response in clear sections with bullet points where appropriate.
-        Keep the tone encouraging while being honest about areas for improvement."""
+        # Reuse feedback for near-duplicate transcripts delivered the same way
+        delivery_context = (
+            tuple(sorted(filler_words.items())),
+            tuple(emotion['name'] for emotion in emotion_data['dominant_emotions'])
+        )
+        embedding = None
+        if transcript:
+            try:
+                embedding = embed_transcript(transcript)
+                cached_feedback = feedback_cache.get(embedding, delivery_context)
+                if cached_feedback is not None:
+                    return {
+                        'success': True,
+                        'feedback': cached_feedback
+                    }
+            except Exception as e:
+                print(f"Error in embed_transcript: {str(e)}")
+                embedding = None
 
         # Generate feedback
-        response = model.generate_content(prompt)
+        response = model.generate_content([COACH_INSTRUCTION, transcript_block, emotion_block, filler_block])
+
+        prompt_cache.set(prompt_key, response.text)
+        if embedding is not None:
+            feedback_cache.add(embedding, delivery_context, response.text)
         
         return {
             'success': True,
@@ -204,53 +660,69 @@ async def analyze():
     Process uploaded audio file and perform comprehensive analysis
     """
     try:
-        if 'audio' not in request.files:
+        # Parse the multipart body off the shared event loop
+        files = await asyncio.to_thread(lambda: request.files)
+        if 'audio' not in files:
             return jsonify({'error': 'No audio file provided'}), 400
         
-        audio_file = request.files['audio']
+        audio_file = files['audio']
         if audio_file.filename == '':
             return jsonify({'error': 'No selected audio file'}), 400
 
-        # Save audio file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_audio:
-            audio_file.save(temp_audio.name)
-            
-            try:
-                # 1. Analyze emotions
-                emotion_analysis = await analyze_voice_emotion(temp_audio.name)
-                if not emotion_analysis['success']:
-                    raise Exception(f"Emotion analysis failed: {emotion_analysis.get('error')}")
-
-                # 2. Transcribe speech
-                transcription = await transcribe_audio(temp_audio.name)
-                if not transcription['success']:
-                    raise Exception(f"Transcription failed: {transcription.get('error')}")
-
-                # 3. Count filler words
-                filler_word_counts = count_filler_words(transcription['transcript'])
-
-                # 4. Generate feedback
-                feedback = generate_feedback(
-                    transcription['transcript'],
-                    emotion_analysis,
-                    filler_word_counts
-                )
-                if not feedback['success']:
-                    raise Exception(f"Feedback generation failed: {feedback.get('error')}")
-
-                # Prepare response
-                response = {
-                    'transcript': transcription['transcript'],
-                    'emotionalAnalysis': emotion_analysis,
-                    'fillerWords': filler_word_counts,
-                    'feedback': feedback['feedback']
-                }
-
-                return jsonify(response)
-
-            finally:
-                # Clean up temporary file
-                os.unlink(temp_audio.name)
+        # Return the cached response for an identical upload
+        audio_bytes, cache_key = await asyncio.to_thread(read_upload, audio_file)
+        cached_response = response_cache.get(cache_key)
+        if cached_response is not None:
+            return jsonify(cached_response)
+
+        # Downmix and resample once, shared by both APIs
+        try:
+            samples = await asyncio.to_thread(prepare_audio, audio_bytes)
+        except sf.SoundFileError:
+            return jsonify({'error': 'Unsupported or corrupted audio file'}), 400
+
+        if is_audio_too_quiet_or_short(samples):
+            return jsonify({'error': 'Audio is too quiet or too short to analyze'}), 400
+
+        # Hume gets WAV; STT gets the smaller, lossless FLAC
+        wav_bytes, flac_bytes = await asyncio.gather(
+            asyncio.to_thread(encode_audio, samples, 'WAV'),
+            asyncio.to_thread(encode_audio, samples, 'FLAC')
+        )
+
+        # 1-2. Analyze emotions and transcribe speech concurrently
+        emotion_analysis, transcription = await asyncio.gather(
+            analyze_voice_emotion(wav_bytes),
+            transcribe_audio(flac_bytes)
+        )
+        if not emotion_analysis['success']:
+            raise Exception(f"Emotion analysis failed: {emotion_analysis.get('error')}")
+        if not transcription['success']:
+            raise Exception(f"Transcription failed: {transcription.get('error')}")
+
+        # 3. Count filler words
+        filler_word_counts = count_filler_words(transcription['transcript'])
+
+        # 4. Generate feedback
+        feedback = await asyncio.to_thread(
+            generate_feedback,
+            transcription['transcript'],
+            emotion_analysis,
+            filler_word_counts
+        )
+        if not feedback['success']:
+            raise Exception(f"Feedback generation failed: {feedback.get('error')}")
+
+        # Prepare response
+        response = {
+            'transcript': transcription['transcript'],
+            'emotionalAnalysis': emotion_analysis,
+            'fillerWords': filler_word_counts,
+            'feedback': feedback['feedback']
+        }
+        response_cache.set(cache_key, response)
+
+        return jsonify(response)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,23 @@
+# Gunicorn configuration for running the backend in production:
+#   gunicorn -c gunicorn.conf.py app:app
+
+bind = "0.0.0.0:5000"
+
+# Each request thread only waits on app.py's shared event loop, which runs
+# the work and sends blocking steps to its LOOP_EXECUTOR_WORKERS (32)
+# threads. A request holds at most two of those at once, so 16 request
+# threads per worker is the concurrency that executor can actually serve.
+# The response caches and the Hume job batcher live in each worker process,
+# so keep few processes: more would split cache hits and Hume batches
+# between them. Two workers keep one serving while the other restarts.
+workers = 2
+worker_class = "gthread"
+threads = 16
+
+# app.py starts a background event loop thread at import, which does not
+# survive fork, so each worker imports the app itself
+preload_app = False
+
+# For gthread workers this is the worker heartbeat timeout, not a
+# per-request limit; requests are bounded by ASYNC_ROUTE_TIMEOUT in app.py
+timeout = 120
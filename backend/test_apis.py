@@ -19,10 +19,12 @@ def create_test_audio():
     sample_rate = 16000
     frequency = 440  # Hz (A4 note)
     
-    # Generate sine wave
-    t = np.linspace(0, duration, int(sample_rate * duration), False)
-    audio_data = np.sin(2 * np.pi * frequency * t)
-    audio_data = (audio_data * 32767).astype(np.int16)
+    # Generate sine wave in float32, scaling in place before the int16 cast
+    t = np.arange(int(sample_rate * duration), dtype=np.float32) / sample_rate
+    np.sin(2 * np.pi * frequency * t, out=t)
+    np.multiply(t, 32767, out=t)
+    np.rint(t, out=t)
+    audio_data = t.astype(np.int16)
     
     # Save as WAV file
     with wave.open('test_audio.wav', 'w') as wav_file:
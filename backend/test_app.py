@@ -0,0 +1,171 @@
+import asyncio
+import io
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+from flask import Flask, jsonify
+from hume import BatchJobStatus
+
+import app
+from app import HumeJobBatcher, SemanticCache
+
+
+class FakeJob:
+    id = 'job-id'
+
+    def __init__(self, paths, predictions=None, failed=False, polls_until_done=1):
+        self.paths = paths
+        self.predictions = predictions
+        self.failed = failed
+        self.polls_until_done = polls_until_done
+
+    def get_status(self):
+        if self.polls_until_done > 0:
+            self.polls_until_done -= 1
+            return BatchJobStatus.IN_PROGRESS
+        return BatchJobStatus.FAILED if self.failed else BatchJobStatus.COMPLETED
+
+    def get_predictions(self):
+        if self.polls_until_done > 0:
+            return {"message": "Job is in progress"}
+        if self.predictions is not None:
+            return self.predictions
+        return [
+            {'source': {'type': 'file', 'filename': os.path.basename(path)}, 'results': {'predictions': path}}
+            for path in self.paths
+        ]
+
+
+class FakeHumeClient:
+    def __init__(self, **job_kwargs):
+        self.job_kwargs = job_kwargs
+        self.submitted = []
+
+    def submit_job(self, urls, configs, files=None):
+        self.submitted.append(list(files))
+        return FakeJob(files, **self.job_kwargs)
+
+
+def run_batch(client, paths):
+    batcher = HumeJobBatcher(client, [], max_batch_size=8, max_latency=0.05, job_timeout=1, poll_interval=0.01)
+
+    async def submit_all():
+        return await asyncio.wait_for(
+            asyncio.gather(*[batcher.submit(path) for path in paths]),
+            timeout=5
+        )
+
+    return asyncio.run(submit_all())
+
+
+def test_batch_fans_results_back_per_file():
+    client = FakeHumeClient()
+    results = run_batch(client, ['/tmp/first.wav', '/tmp/second.wav'])
+
+    assert client.submitted == [['/tmp/first.wav', '/tmp/second.wav']]
+    assert [result['results']['predictions'] for result in results] == ['/tmp/first.wav', '/tmp/second.wav']
+
+
+def test_batch_failure_is_raised_to_callers():
+    with pytest.raises(RuntimeError, match="failed"):
+        run_batch(FakeHumeClient(failed=True), ['/tmp/first.wav'])
+
+
+def test_job_still_in_progress_times_out():
+    with pytest.raises(TimeoutError):
+        run_batch(FakeHumeClient(polls_until_done=10 ** 6), ['/tmp/first.wav'])
+
+
+def test_malformed_predictions_are_raised_to_callers():
+    with pytest.raises(TypeError):
+        run_batch(FakeHumeClient(predictions={"message": "Job is in progress"}), ['/tmp/first.wav'])
+
+
+def test_analyze_voice_emotion_reads_grouped_prosody_predictions(monkeypatch):
+    async def fake_submit(path):
+        return {
+            'source': {'type': 'file', 'filename': os.path.basename(path)},
+            'results': {'predictions': [{
+                'file': os.path.basename(path),
+                'models': {'prosody': {'grouped_predictions': [{
+                    'id': 'unknown',
+                    'predictions': [{'emotions': [
+                        {'name': 'Calmness', 'score': 0.2},
+                        {'name': 'Determination', 'score': 0.9},
+                    ]}]
+                }]}}
+            }]}
+        }
+
+    monkeypatch.setattr(app.hume_batcher, 'submit', fake_submit)
+    result = asyncio.run(app.analyze_voice_emotion(b'RIFF'))
+
+    assert result['success']
+    assert result['dominant_emotions'][0] == {'name': 'Determination', 'score': 0.9}
+
+
+def test_semantic_cache_requires_matching_context():
+    cache = SemanticCache(threshold=0.92, max_size=2)
+    embedding = np.array([1.0, 0.0], dtype=np.float32)
+    cache.add(embedding, ('first take',), 'feedback for the first take')
+
+    assert cache.get(embedding, ('first take',)) == 'feedback for the first take'
+    assert cache.get(embedding, ('second take',)) is None
+
+
+def test_async_route_times_out(monkeypatch):
+    monkeypatch.setattr(app, 'ASYNC_ROUTE_TIMEOUT', 0.1)
+    test_app = Flask(__name__)
+
+    @test_app.route('/slow')
+    @app.async_route
+    async def slow():
+        await asyncio.sleep(5)
+
+    response = test_app.test_client().get('/slow')
+
+    assert response.status_code == 504
+
+
+def test_analyze_decodes_formats_beyond_wav_and_mp3():
+    flac = io.BytesIO()
+    sf.write(flac, np.zeros(16000 * 2, dtype=np.int16), 16000, format='FLAC')
+    flac.seek(0)
+
+    response = app.app.test_client().post(
+        '/analyze',
+        data={'audio': (flac, 'speech.flac')},
+        content_type='multipart/form-data'
+    )
+
+    # Decoded and rejected as silent, not turned away by its extension
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Audio is too quiet or too short to analyze'
+
+
+def test_orjson_provider_honours_dumps_options():
+    assert app.app.json.dumps({'b': 1, 'a': 2}, sort_keys=True) == '{"a":2,"b":1}'
+    with pytest.raises(TypeError):
+        app.app.json.dumps({}, cls=object)
+
+    with app.app.app_context():
+        response = jsonify({'text': 'привет'})
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == {'text': 'привет'}
+
+
+@pytest.mark.parametrize('use_automaton', [True, False])
+@pytest.mark.parametrize('transcript, expected', [
+    ("Это нужно сделать.", {'это': 1}),
+    ("Эээ ну, начнём.", {'эээ': 1, 'ну': 1}),
+    ("ээээ", {'эээ': 1}),
+    ("Мммм... эээээ, нууу", {'ммм': 1, 'эээ': 1, 'ну': 1}),
+    ("Как-то так сказать", {'как-то так': 1, 'так сказать': 1}),
+])
+def test_count_filler_words(monkeypatch, use_automaton, transcript, expected):
+    if not use_automaton:
+        monkeypatch.setattr(app, 'FILLER_AUTOMATON', None)
+
+    assert app.count_filler_words(transcript) == expected